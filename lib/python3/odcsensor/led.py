@@ -12,19 +12,67 @@ Functions:
     main
     class_test
 """
-import RPi.GPIO as GPIO
+import atexit
+import weakref
 
-GPIO.setmode(GPIO.BOARD)
+import pigpio
+
+from pinout import board_to_bcm
+
+__all__ = ["LED"]
+
+# BCM GPIOs that are wired to the PWM peripheral and their PWM channel
+HARDWARE_PWM_CHANNELS = {12: 0, 18: 0, 13: 1, 19: 1}
+
+_PI = None
+_LEDS = weakref.WeakSet()
+# PWM channels already driven by an LED; a channel outputs the same signal on all its GPIOs
+_USED_PWM_CHANNELS = set()
+
+def _get_pi():
+    """
+    Return the pigpio daemon connection shared by all LED instances;
+    it is opened on first use and closed when the interpreter exits.
+
+    Returns: pigpio.pi
+    """
+    global _PI
+    if _PI is None:
+        pi = pigpio.pi()
+        if not pi.connected:
+            raise RuntimeError("cannot connect to pigpiod")
+        _PI = pi
+        atexit.register(_stop_pi)
+    return _PI
+
+def _stop_pi():
+    """
+    Switch off all LEDs still alive and close the shared pigpio daemon connection;
+    pigpiod keeps generating PWM after the client is gone, so the pins have to be
+    switched off before.
+    """
+    global _PI
+    if _PI is None:
+        return
+    for led in list(_LEDS):
+        led._switch_off()
+    _PI.stop()
+    _PI = None
 
 class LED:
     """
     Class to controll an LED via a GPIO PIN in GPIO.BOARD configuration.
     Each class instance controls exactly one pin.
+    PWM is generated by the pigpio daemon (DMA timed) instead of a Python thread;
+    on pins connected to the PWM peripheral the hardware PWM is used, as long as
+    no other LED already uses the same PWM channel.
     Make sure they are not overlapping!
 
     Methods:
         __init__(pin, freq, is_inverse)
         __del__()
+        _switch_off()
+        _write_pwm(freq, duty_cycle)
         freq()
         set_freq(freq)
         duty_cycle()
@@ -44,19 +92,55 @@ class LED:
         """ 
         self._pin = pin
         self._is_inverse = is_inverse
-        GPIO.setup(self._pin, GPIO.OUT)
-        GPIO.output(self._pin, GPIO.LOW)
-        
-        self._freq = freq
+        self._gpio = board_to_bcm(pin)
+        self._is_hardware = False
+        self._pi = _get_pi()
+        channel = HARDWARE_PWM_CHANNELS.get(self._gpio)
+        if channel is not None and channel not in _USED_PWM_CHANNELS:
+            _USED_PWM_CHANNELS.add(channel)
+            self._is_hardware = True
+        self._pi.set_mode(self._gpio, pigpio.OUTPUT)
+        self._pi.write(self._gpio, 0)
+
+        self._freq = int(round(freq))
         self._duty_cycle = 0 if not self._is_inverse else 100
-        self._pwm = GPIO.PWM(self._pin, self._freq)
-        self._pwm.start(self._duty_cycle)
+        if not self._is_hardware:
+            self._pi.set_PWM_frequency(self._gpio, self._freq)
+            self._pi.set_PWM_range(self._gpio, 100)
+        self._write_pwm(self._freq, self._duty_cycle)
+        _LEDS.add(self)
     def __del__(self):
         """
-        Destructor to stop PWM activated on a pin and setup the output low.
+        Destructor to stop PWM activated on a pin and switch the LED off.
         """ 
-        self._pwm.stop()
-        GPIO.output(self._pin, GPIO.LOW)
+        if getattr(self, "_is_hardware", False):
+            _USED_PWM_CHANNELS.discard(HARDWARE_PWM_CHANNELS[self._gpio])
+        if _PI is None:
+            return
+        self._switch_off()
+
+    def _switch_off(self):
+        """
+        Internal function to stop PWM activated on a pin and set the output to the
+        level the LED is off at (high for an inverse LED, low otherwise).
+        """
+        if self._is_hardware:
+            self._pi.hardware_PWM(self._gpio, 0, 0)
+        self._pi.write(self._gpio, 1 if self._is_inverse else 0)
+
+    def _write_pwm(self, freq, duty_cycle):
+        """
+        Internal function to hand a frequency and duty cycle to pigpio;
+        the hardware PWM expects the duty cycle in parts per million.
+
+        Keyword Arguments:
+            freq -- the frequency to be written
+            duty_cycle -- the (already inverted) duty cycle to be written
+        """
+        if self._is_hardware:
+            self._pi.hardware_PWM(self._gpio, freq, duty_cycle * 10000)
+        else:
+            self._pi.set_PWM_dutycycle(self._gpio, duty_cycle)
 
     def freq(self):
         """
@@ -68,12 +152,20 @@ class LED:
     def set_freq(self, freq):
         """
         Function to set the frequency for the LED.
+        Nothing is sent to pigpio if the frequency is unchanged; the frequency
+        is only stored once pigpio accepted it.
 
         Keyword Arguments:
-            freq -- the frequency to be set
+            freq -- the frequency to be set, rounded to an integer
         """ 
+        freq = int(round(freq))
+        if freq == self._freq:
+            return
+        if self._is_hardware:
+            self._write_pwm(freq, self._duty_cycle)
+        else:
+            self._pi.set_PWM_frequency(self._gpio, freq)
         self._freq = freq
-        self._pwm.ChangeFrequency(freq)
 
     def duty_cycle(self):
         """
@@ -86,27 +178,32 @@ class LED:
     def set_duty_cycle(self, duty_cycle):
         """
         Function to set the duty cycle (PWM; dimming) for the LED.
-        Has to be an integer 0 <= duty_cycle <= 100.
+        Has to be 0 <= duty_cycle <= 100 and is rounded to an integer, as pigpio
+        only takes integers for both hardware and DMA PWM.
+        Nothing is sent to pigpio if the duty cycle is unchanged, to avoid
+        glitches by reprogramming the PWM in the middle of a period; the duty
+        cycle is only stored once pigpio accepted it.
 
         Keyword Arguments:
             duty_cycle -- the frequency to be set
         """
-        dc = min(100,max(duty_cycle,0))
-        self._duty_cycle = dc if not self._is_inverse else 100 - dc
-        self._pwm.ChangeDutyCycle(self._duty_cycle)
+        dc = 0 if duty_cycle < 0 else (100 if duty_cycle > 100 else int(round(duty_cycle)))
+        dc = dc if not self._is_inverse else 100 - dc
+        if dc == self._duty_cycle:
+            return
+        self._write_pwm(self._freq, dc)
+        self._duty_cycle = dc
 
     def set_on(self):
         """
         Function to switch an LED on and set the duty cycle to max.
         """
         self.set_duty_cycle(100)
-        GPIO.output(self._pin, GPIO.HIGH)
     def set_off(self):
         """
         Function to switch an LED off and set the duty cycle to min.
         """
         self.set_duty_cycle(0)
-        GPIO.output(self._pin, GPIO.LOW)
 
 
 def class_test():
@@ -117,39 +214,41 @@ def class_test():
     a bit and dim it self.
     For each LED on pin 11 and 12 individually
     """
+    import time
+
     #Basic Testing
     pins = (11,12)
+    schedule = tuple(range(100,-1,-1))
+    sleep = time.sleep
 
     for pin in pins:
         LED1 = LED(pin)
 
         #Basic Turn on and off
         LED1.set_on()
-        time.sleep(1)
+        sleep(1)
         LED1.set_off()
 
-        time.sleep(1)
+        sleep(1)
         
         # Use simple PWM and off
         LED1.set_duty_cycle(50)
-        time.sleep(1)
+        sleep(1)
         LED1.set_off()
 
-        time.sleep(2)
+        sleep(2)
 
         # Turn slowly down
-        for dc in range(100,-1,-1):
-            LED1.set_duty_cycle(dc)
-            time.sleep(0.1)
+        set_duty_cycle = LED1.set_duty_cycle
+        for dc in schedule:
+            set_duty_cycle(dc)
+            sleep(0.1)
+        LED1.set_off()
         del LED1
 
-    GPIO.cleanup()
-
 
 if __name__ == "__main__":
     """
     A main function that is used, when this module is used as a stand-alone script.
-    Local imports in order not to disturb library import functionality (keeping it clean!)
     """
-    import time
     class_test()
\ No newline at end of file
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+This module provides the mapping of the physical pin header (GPIO.BOARD numbering)
+onto the Broadcom GPIO numbers (BCM numbering) of a 40 pin Raspberry Pi.
+Backends like pigpio or the GPIO character device only know BCM numbers, while
+all classes of this library are configured with GPIO.BOARD pins.
+
+Functions:
+    board_to_bcm
+"""
+
+BOARD_TO_BCM = {
+     3:  2,  5:  3,  7:  4,  8: 14, 10: 15, 11: 17, 12: 18, 13: 27,
+    15: 22, 16: 23, 18: 24, 19: 10, 21:  9, 22: 25, 23: 11, 24:  8,
+    26:  7, 27:  0, 28:  1, 29:  5, 31:  6, 32: 12, 33: 13, 35: 19,
+    36: 16, 37: 26, 38: 20, 40: 21,
+}
+
+
+def board_to_bcm(pin):
+    """
+    Translate a GPIO.BOARD pin into the corresponding BCM GPIO number.
+    Power and ground pins have no GPIO associated and are rejected.
+
+    Keyword Arguments:
+        pin -- the GPIO.BOARD pin
+
+    Returns: BCM GPIO number
+    """
+    try:
+        return BOARD_TO_BCM[pin]
+    except KeyError:
+        raise ValueError("Pin {} is not a GPIO pin in GPIO.BOARD numbering".format(pin))
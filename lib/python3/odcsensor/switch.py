@@ -8,6 +8,9 @@ a certain switch pin related to exact one Switch.
 The developer/user has to make sure, that there are no overlapping instances used...
 In addition some basic functionality tests are provide as stand-alone script.
 
+Edge events of all switches are read from the GPIO character device (libgpiod)
+and dispatched by one shared epoll thread, independent of the number of switches.
+
 Classes:
     Switch
 Functions:
@@ -15,9 +18,45 @@ Functions:
     class_Switch_test
     class_Switch_functor
 """
-import RPi.GPIO as GPIO
+import selectors
+import threading
+import traceback
+from datetime import timedelta
+
+import gpiod
+from gpiod.line import Bias, Direction, Edge
+
+from pinout import board_to_bcm
 
-GPIO.setmode(GPIO.BOARD)
+GPIO_CHIP = "/dev/gpiochip0"
+
+_SELECTOR = None
+_SELECTOR_LOCK = threading.Lock()
+
+def _event_selector():
+    """
+    Return the epoll selector shared by all Switch instances; on first use
+    it is created together with the background thread dispatching edge events,
+    so importing this module does not set up anything.
+
+    Returns: selectors.EpollSelector
+    """
+    global _SELECTOR
+    with _SELECTOR_LOCK:
+        if _SELECTOR is None:
+            _SELECTOR = selectors.EpollSelector()
+            threading.Thread(target=_event_loop, name="odcsensor-switch", daemon=True).start()
+        return _SELECTOR
+
+def _event_loop():
+    """
+    Wait on all registered line requests and call the callback
+    of the switch instance each ready one belongs to.
+    The callbacks handle their errors themselves, see Switch._specialize_callback.
+    """
+    while True:
+        for key, _ in _SELECTOR.select():
+            key.data()
 
 class Switch:
     """
@@ -29,6 +68,7 @@ class Switch:
 
     Methods:
         __init__(pin, freq, is_inverse)
+        close()
         bouncetime()
         set_bouncetime(bouncetime)
         functor()
@@ -36,25 +76,25 @@ class Switch:
         edge()
         set_edge(edge)
         _update_callback()
-        _press_btn(*args)
+        _specialize_callback()
         default_functor()
     """
+    _EDGE_MAP = {1: Edge.RISING, -1: Edge.FALLING, 0: Edge.BOTH}
+    _LEVEL_MAP = {gpiod.EdgeEvent.Type.RISING_EDGE: 1, gpiod.EdgeEvent.Type.FALLING_EDGE: 0}
+
+    @staticmethod
     def map_edge(edge):
         """
         Translate users integer input to return corresponding
-        GPIO edge detection states (GPIO.RISING, GPIO.FALLING, GPIO.BOTH).
-        GPIO.RISING means callback connected to an voltage increase
+        edge detection states (Edge.RISING, Edge.FALLING, Edge.BOTH).
+        Edge.RISING means callback connected to an voltage increase
         (e.g. pull-down-resistor with button pressed)
         
         Keyword Arguments:
             edge -- Integer to set/update the wished edge detection mode.
                     >0: RISING, ==0: BOTH, <0: FALLING
         """
-        if edge > 0:
-            return GPIO.RISING
-        if edge < 0:
-            return  GPIO.FALLING
-        return GPIO.BOTH
+        return Switch._EDGE_MAP[(edge > 0) - (edge < 0)]
 
     def __init__(self, pin, functor=None, bouncetime=10, edge_detector=0, pud=1):
         """
@@ -65,44 +105,63 @@ class Switch:
         Keyword Arguments:
             pin -- the GPIO.BOARD pin
             functor -- function pointer, what should be called on switch action; (default: None -> calls default functor)
-            bouncetime -- switch sleepyness, in which periods signals are ignored (do not react on button flickering) (default: 10)
-            edge_detector -- integer to indicate on which kind of signal change (edge) to be listened to (default: 0 -> GPIO.BOTH)
-            pud -- Integer to indicate if it is pull-up or pull-down resistor (default: 1 -> GPIO.PUD_UP)
+            bouncetime -- debounce period in ms the line has to be stable before an edge is reported (do not react on button flickering) (default: 10)
+            edge_detector -- integer to indicate on which kind of signal change (edge) to be listened to (default: 0 -> Edge.BOTH)
+            pud -- Integer to indicate if it is pull-up or pull-down resistor (default: 1 -> Bias.PULL_UP)
         """
         self._pin = pin
+        self._gpio = board_to_bcm(pin)
         self._functor = functor if functor is not None else Switch.default_functor
         self._bouncetime = bouncetime
         self._edge = Switch.map_edge(edge_detector)
-        self._pud = GPIO.PUD_UP if pud >= 0 else GPIO.PUD_DOWN
+        self._pud = Bias.PULL_UP if pud >= 0 else Bias.PULL_DOWN
 
-        GPIO.setup(self._pin, GPIO.IN, pull_up_down=self._pud)
+        self._request = None
+        self._closed = False
+        self._lock = threading.Lock()
         self._update_callback()
 
+    def close(self):
+        """
+        Stop listening to the switch and release the GPIO line;
+        an edge event already taken by the event thread is dropped.
+        Closing is final, later changes of edge or bouncetime are only stored.
+        """
+        with self._lock:
+            self._closed = True
+            if self._request is None:
+                return
+            _event_selector().unregister(self._request.fd)
+            self._request.release()
+            self._released.set()
+            self._request = None
+
     def pud(self):
         """
         Return the PUD (pull up or down) resistor state of switch.
         Cannot be set, only during creation of switch instance.
         
-        Returns: GPIO.PUD_UP or GPIO.PUD_DOWN 
+        Returns: Bias.PULL_UP or Bias.PULL_DOWN 
         """
         return self._pud
 
     def bouncetime(self):
         """
-        Return the currently used bouncetime; bouncetime indicates how fast a signal change (edge)
-        should/can trigger the callback function.
+        Return the currently used bouncetime; bouncetime is the debounce period in ms, for which
+        the line has to be stable before a signal change (edge) triggers the callback function.
 
         Returns: bouncetime -- integer
         """
         return self._bouncetime
     def set_bouncetime(self, bouncetime):
         """
-        Override the currently used bouncetime; will trigger an update of the callback function
-        by removing and adding (with new values) an event_detection to button signal pin.
-        Bouncetime indicates how fast a signal change (edge) should/can trigger the callback function.
+        Override the currently used bouncetime; the GPIO line is reconfigured in place with the
+        new debounce period, the line stays requested and registered at the event thread.
+        The debounce period is the time in ms the line has to be stable before a signal change
+        (edge) is reported; unlike RPi.GPIO, edges are not ignored for a time after the first one.
 
         Keyword Arguments:
-            bouncetime -- switch sleepyness, after which time periods signals are recognised.
+            bouncetime -- debounce period in ms
         """
         self._bouncetime = bouncetime
         self._update_callback()
@@ -124,14 +183,18 @@ class Switch:
         Keyword Arguments:
             functor -- function pointer
         """
-        self._functor = functor
+        with self._lock:
+            self._functor = functor
+            if self._request is not None:
+                self._specialize_callback()
+                _event_selector().modify(self._request.fd, selectors.EVENT_READ, self._press_btn)
 
     def edge(self):
         """
         Returns the currently used edge detection for the switch.
-        Indicates if it is configured to listen on GPIO.RISING, -.FALLING or -.BOTH.
+        Indicates if it is configured to listen on Edge.RISING, -.FALLING or -.BOTH.
 
-        Returns: GPIO.BOTH, GPIO.FALLING or GPIO.RISING
+        Returns: Edge.BOTH, Edge.FALLING or Edge.RISING
         """
         return self._edge
     def set_edge(self, edge_detector):
@@ -151,23 +214,67 @@ class Switch:
 
     def _update_callback(self):
         """
-        Internal function that is used to update the callback by removing and adding
-        the event_detection with adjusted values.
+        Internal function that is used to update the callback by requesting or
+        reconfiguring the GPIO line with adjusted values; a newly requested line
+        is registered at the shared event thread; nothing is done once the switch is closed.
         Is used in order to included changes on edge or bouncetime.
         """
-        GPIO.remove_event_detect(self._pin)
-        GPIO.add_event_detect(self._pin, self._edge, callback=self._press_btn, bouncetime=self._bouncetime)
-
-    def _press_btn(self, *args):
+        config = {
+            self._gpio: gpiod.LineSettings(
+                direction=Direction.INPUT,
+                edge_detection=self._edge,
+                bias=self._pud,
+                debounce_period=timedelta(milliseconds=self._bouncetime))
+        }
+        with self._lock:
+            if self._closed:
+                return
+            if self._request is not None:
+                self._request.reconfigure_lines(config)
+                return
+            self._request = gpiod.request_lines(GPIO_CHIP, consumer="odcsensor-switch", config=config)
+            self._released = threading.Event()
+            self._specialize_callback()
+            _event_selector().register(self._request.fd, selectors.EVENT_READ, self._press_btn)
+
+    def _specialize_callback(self):
         """
-        Internal callback function that is used when a switch is triggered;
-        generically makes use of the given functor (default or adjusted by needs);
-        the current button/pin state is provided to the functor.
-
-        Keyword Arguments:
-            args -- generic arguments from the callback, currently not used.
+        Internal function that builds the callback used when a switch is triggered
+        as closure over the line request and the functor (default or adjusted by needs),
+        so no lookups on the instance are done per edge; has to be rebuilt whenever
+        the functor changes.
+        The button/pin state after each edge event is provided to the functor;
+        it is taken from the edge type, so the line value is not read again.
+        Events are read under the switch lock, so a concurrent close() cannot
+        release the line in between; the functor itself is called outside of it.
+        Errors of the functor are printed, so the shared event thread keeps working;
+        if reading the line fails, the error is printed once and the switch is closed,
+        as epoll would report the line again right away.
         """
-        self._functor(GPIO.input(self._pin))
+        read_edge_events = self._request.read_edge_events
+        functor = self._functor
+        level_map = Switch._LEVEL_MAP
+        lock = self._lock
+        released = self._released
+        close = self.close
+
+        def press_btn(*args):
+            try:
+                with lock:
+                    if released.is_set():
+                        return
+                    events = read_edge_events()
+            except Exception:
+                traceback.print_exc()
+                close()
+                return
+            for event in events:
+                try:
+                    functor(level_map[event.event_type])
+                except Exception:
+                    traceback.print_exc()
+
+        self._press_btn = press_btn
 
     
     def default_functor(input):
@@ -229,7 +336,9 @@ def class_switch_test():
     time.sleep(10)
     print("Done!")
 
-    GPIO.cleanup()
+    BTN1.close()
+    LED1.set_off()
+    LED2.set_off()
 
 
 if __name__ == "__main__":